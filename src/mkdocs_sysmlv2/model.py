@@ -2,11 +2,18 @@
 
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 
+# Slotted dataclasses drop the per-instance __dict__; the option needs 3.10+.
+_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+# Package key used for elements declared outside of any package.
+GLOBAL_PACKAGE = "__global__"
+
+
+@dataclass(**_SLOTS)
 class SysMLPackage:
     """Represents a SysML package declaration."""
 
@@ -14,7 +21,7 @@ class SysMLPackage:
     description: Optional[str] = None
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class SysMLRelation:
     """Represents a relation between two SysML elements."""
 
@@ -24,7 +31,7 @@ class SysMLRelation:
     label: Optional[str] = None
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class SysMLElement:
     """Represents a SysML element definition or usage."""
 
@@ -36,6 +43,30 @@ class SysMLElement:
     specializes: List[str] = field(default_factory=list)
     modifiers: List[str] = field(default_factory=list)
     external: bool = False
+    # Membership mirrors of the list fields so appends can skip duplicates.
+    _type_of_set: Set[str] = field(init=False, repr=False, compare=False)
+    _specializes_set: Set[str] = field(init=False, repr=False, compare=False)
+    _modifiers_set: Set[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._type_of_set = set(self.type_of)
+        self._specializes_set = set(self.specializes)
+        self._modifiers_set = set(self.modifiers)
+
+    def add_type_of(self, value: str) -> None:
+        if value and value not in self._type_of_set:
+            self._type_of_set.add(value)
+            self.type_of.append(value)
+
+    def add_specializes(self, value: str) -> None:
+        if value and value not in self._specializes_set:
+            self._specializes_set.add(value)
+            self.specializes.append(value)
+
+    def add_modifier(self, value: str) -> None:
+        if value and value not in self._modifiers_set:
+            self._modifiers_set.add(value)
+            self.modifiers.append(value)
 
 
 class SysMLModel:
@@ -48,34 +79,33 @@ class SysMLModel:
         self.packages: List[SysMLPackage] = []
         self._node_index: Dict[str, SysMLElement] = {}
         self._package_index: Dict[str, SysMLPackage] = {}
+        # Bumped on every change made through the add_* methods so cached
+        # renderings can tell when they are stale.
+        self.version = 0
 
     def add_package(self, name: str) -> SysMLPackage:
         if name in self._package_index:
             return self._package_index[name]
 
+        self.version += 1
         package = SysMLPackage(name=name)
         self.packages.append(package)
         self._package_index[name] = package
         return package
 
     def add_node(self, node: SysMLElement) -> SysMLElement:
+        self.version += 1
         if node.name in self._node_index:
             existing = self._node_index[node.name]
             # Preserve whichever information is richer.
             if not existing.package and node.package:
                 existing.package = node.package
-            if node.specializes:
-                existing.specializes = list(
-                    dict.fromkeys(existing.specializes + node.specializes)
-                )
-            if node.type_of:
-                existing.type_of = list(
-                    dict.fromkeys(existing.type_of + node.type_of)
-                )
-            if node.modifiers:
-                existing.modifiers = list(
-                    dict.fromkeys(existing.modifiers + node.modifiers)
-                )
+            for value in node.specializes:
+                existing.add_specializes(value)
+            for value in node.type_of:
+                existing.add_type_of(value)
+            for value in node.modifiers:
+                existing.add_modifier(value)
             existing.external = existing.external and node.external
             return existing
 
@@ -84,15 +114,19 @@ class SysMLModel:
         return node
 
     def add_relation(self, relation: SysMLRelation) -> None:
+        self.version += 1
         self.relations.append(relation)
 
     def ensure_relation_nodes(self) -> None:
-        for relation in self.relations:
-            for endpoint in (relation.source, relation.target):
-                if endpoint not in self._node_index:
-                    self.add_node(
-                        SysMLElement(
-                            name=endpoint, kind="external", external=True
-                        )
-                    )
-
+        # Ordered de-duplication keeps external nodes in first-seen order,
+        # which the renderer's layout depends on.
+        endpoints = dict.fromkeys(
+            endpoint
+            for relation in self.relations
+            for endpoint in (relation.source, relation.target)
+        )
+        for endpoint in endpoints:
+            if endpoint not in self._node_index:
+                self.add_node(
+                    SysMLElement(name=endpoint, kind="external", external=True)
+                )
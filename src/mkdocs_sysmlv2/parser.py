@@ -4,22 +4,44 @@ from __future__ import annotations
 
 import html
 import re
-import shlex
 from dataclasses import dataclass
-from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from .model import SysMLElement, SysMLModel, SysMLRelation
 
-CONNECT_RE = re.compile(
-    r"connect\s+(?P<src>[^\s]+)\s+(?:to|with)\s+(?P<dst>[^\s;]+)", re.IGNORECASE
+RELATION_RE = re.compile(
+    r"(?:connect\s+(?P<c_src>[^\s]+)\s+(?:to|with)\s+(?P<c_dst>[^\s;]+))"
+    r"|(?:from\s+(?P<f_src>[^\s]+)\s+to\s+(?P<f_dst>[^\s;]+))"
+    r"|(?:(?:subject|actor|item|port)\s+(?P<r_src>[\w\.]+)\s*:\s*(?P<r_dst>[^\s;]+))",
+    re.IGNORECASE,
 )
-FLOW_RE = re.compile(
-    r"from\s+(?P<src>[^\s]+)\s+to\s+(?P<dst>[^\s;]+)", re.IGNORECASE
+# Relation kind and label keyed by the group prefix of RELATION_RE.
+RELATION_KINDS = {
+    "c": ("connects", "connects"),
+    "f": ("flows", "flows"),
+    "r": ("typed", "role"),
+}
+# Every RELATION_RE alternative starts with one of these keywords.
+RELATION_HINTS = ("connect", "from", "subject", "actor", "item", "port")
+# Statements that are always relations and never declare an element.
+RELATION_KEYWORDS = frozenset({"connect", "from"})
+# Typing (:) and specialization (:>, :>>) operators following a name.
+TYPE_OPERATORS = frozenset({":", ":>", ":>>"})
+PACKAGE_RE = re.compile(r"^package\s+([^ {]+)", re.IGNORECASE)
+# Block comments and line comments are dropped; newlines end a logical line.
+# Braces are matched on their own so they can be counted, while quoted
+# strings are kept whole so braces and slashes inside them are plain text.
+LINE_RE = re.compile(
+    r"/\*.*?\*/|//[^\n]*|(?P<eol>\n)|(?P<open>\{)|(?P<close>\})"
+    r"|(?P<text>[^/\n{}\"']+|\"[^\"\n]*\"|'[^'\n]*'|.)",
+    re.DOTALL,
 )
-ROLE_RE = re.compile(
-    r"(?:subject|actor|item|port)\s+(?P<name>[\w\.]+)\s*:\s*(?P<target>[^\s;]+)",
-    re.IGNORECASE,
+# Quoted strings, specialization/typing operators, braces, bare words and,
+# last, an unbalanced quote (which invalidates the whole line). Bare words
+# keep their semicolons so entities such as "R&amp;D" stay in one token;
+# _clean_identifier strips the statement's trailing one.
+TOKEN_RE = re.compile(
+    r'"([^"]*)"|\'([^\']*)\'|(:>>|:>|:|[{}])|([^\s,{}"\']+)|(["\'])'
 )
 
 
@@ -32,34 +54,35 @@ class PackageContext:
 class SysMLParser:
     """Parses a subset of the SysML v2 textual syntax."""
 
+    def __init__(self) -> None:
+        # Shared instances of every identifier seen, so repeated names across
+        # nodes, relations and indexes point at a single string.
+        self._intern: Dict[str, str] = {}
+
+    def reset(self) -> None:
+        """Forget identifiers interned by earlier parses."""
+        self._intern.clear()
+
     def parse(self, text: str, *, source_path: Optional[str] = None) -> SysMLModel:
-        cleaned = self._strip_block_comments(text)
         model = SysMLModel(source_path=source_path)
         package_stack: List[PackageContext] = []
 
-        for raw_line in cleaned.splitlines():
+        for raw_line, brace_delta in self._iter_lines(text):
             line = raw_line.strip()
             if not line:
-                self._update_stack(package_stack, raw_line)
                 continue
 
-            if line.startswith("//"):
-                self._update_stack(package_stack, raw_line)
-                continue
-
-            # remove inline comment
-            if "//" in line:
-                line = line.split("//", 1)[0].strip()
-                if not line:
-                    self._update_stack(package_stack, raw_line)
-                    continue
-
-            package_match = re.match(r"^package\s+([^ {]+)", line, re.IGNORECASE)
+            package_match = PACKAGE_RE.match(line)
             if package_match:
                 package_name = self._clean_identifier(package_match.group(1))
                 package_stack.append(PackageContext(name=package_name))
                 model.add_package(package_name)
-                self._update_stack(package_stack, raw_line)
+                self._update_stack(package_stack, brace_delta)
+                continue
+
+            if line.split(None, 1)[0].lower() in RELATION_KEYWORDS:
+                self._extract_relations(line, model)
+                self._update_stack(package_stack, brace_delta)
                 continue
 
             current_package = package_stack[-1].name if package_stack else None
@@ -72,19 +95,44 @@ class SysMLParser:
             if not parsed:
                 self._extract_relations(line, model)
 
-            self._update_stack(package_stack, raw_line)
+            self._update_stack(package_stack, brace_delta)
 
         model.ensure_relation_nodes()
         return model
 
-    def _strip_block_comments(self, text: str) -> str:
-        return re.sub(r"/\*.*?\*/", "", text, flags=re.DOTALL)
+    def _iter_lines(self, text: str) -> Iterator[Tuple[str, int]]:
+        if "/" not in text and '"' not in text and "'" not in text:
+            # Nothing to strip or protect: plain splitting and counting is exact.
+            for line in text.split("\n"):
+                yield line, line.count("{") - line.count("}")
+            return
+
+        parts: List[str] = []
+        delta = 0
+        for match in LINE_RE.finditer(text):
+            kind = match.lastgroup
+            if kind == "text":
+                parts.append(match.group())
+            elif kind == "open":
+                parts.append("{")
+                delta += 1
+            elif kind == "close":
+                parts.append("}")
+                delta -= 1
+            elif kind == "eol":
+                yield "".join(parts), delta
+                parts = []
+                delta = 0
+        if parts:
+            yield "".join(parts), delta
 
     def _tokenize(self, line: str) -> List[str]:
-        try:
-            return shlex.split(line, posix=True)
-        except ValueError:
-            return []
+        tokens: List[str] = []
+        for match in TOKEN_RE.finditer(line):
+            if match.lastindex == 5:
+                return []
+            tokens.append(match.group(match.lastindex))
+        return tokens
 
     def _parse_definition(
         self, tokens: List[str], package: Optional[str], model: SysMLModel
@@ -119,32 +167,22 @@ class SysMLParser:
         if not name:
             return False
 
-        type_of: List[str] = []
-        specializes: List[str] = []
-
-        iterator = list(tokens)
-        idx = 0
-        while idx < len(iterator):
-            token = iterator[idx]
-            lower = token.lower()
-            if lower in {":", ":>", ":>>"}:
-                values = self._collect_identifiers(iterator[idx + 1 :])
-                if lower == ":":
-                    type_of.extend(values)
-                else:
-                    specializes.extend(values)
-                break
-            idx += 1
-
         node = SysMLElement(
             name=name,
             kind=kind_token,
             flavor=flavor,
             package=package,
-            type_of=self._unique(type_of),
-            specializes=self._unique(specializes),
             modifiers=modifiers,
         )
+
+        sep_idx = next(
+            (idx for idx, token in enumerate(tokens) if token in TYPE_OPERATORS), -1
+        )
+        if sep_idx >= 0:
+            add = node.add_type_of if tokens[sep_idx] == ":" else node.add_specializes
+            for value in self._collect_identifiers(tokens[sep_idx + 1 :]):
+                add(value)
+
         model.add_node(node)
 
         for parent in node.specializes:
@@ -178,47 +216,32 @@ class SysMLParser:
 
     def _clean_identifier(self, token: str) -> str:
         cleaned = token.strip(" ,;{}")
-        return html.unescape(cleaned).strip("'\"")
+        if "&" in cleaned:
+            cleaned = html.unescape(cleaned)
+        cleaned = cleaned.strip("'\"")
+        return self._intern.setdefault(cleaned, cleaned)
 
     def _extract_relations(self, line: str, model: SysMLModel) -> None:
-        for match in CONNECT_RE.finditer(line):
-            src = self._clean_identifier(match.group("src"))
-            dst = self._clean_identifier(match.group("dst"))
-            if src and dst:
-                model.add_relation(
-                    SysMLRelation(
-                        source=src,
-                        target=dst,
-                        relation="connects",
-                        label="connects",
-                    )
-                )
-
-        for match in FLOW_RE.finditer(line):
-            src = self._clean_identifier(match.group("src"))
-            dst = self._clean_identifier(match.group("dst"))
-            if src and dst:
-                model.add_relation(
-                    SysMLRelation(
-                        source=src, target=dst, relation="flows", label="flows"
-                    )
-                )
+        lower = line.lower()
+        if not any(keyword in lower for keyword in RELATION_HINTS):
+            return
 
-        for match in ROLE_RE.finditer(line):
-            src = self._clean_identifier(match.group("name"))
-            dst = self._clean_identifier(match.group("target"))
+        for match in RELATION_RE.finditer(line):
+            prefix = match.lastgroup[0]
+            src = self._clean_identifier(match.group(f"{prefix}_src"))
+            dst = self._clean_identifier(match.group(f"{prefix}_dst"))
             if src and dst:
+                relation, label = RELATION_KINDS[prefix]
                 model.add_relation(
                     SysMLRelation(
-                        source=src, target=dst, relation="typed", label="role"
+                        source=src, target=dst, relation=relation, label=label
                     )
                 )
 
-    def _update_stack(self, stack: List[PackageContext], line: str) -> None:
+    def _update_stack(self, stack: List[PackageContext], delta: int) -> None:
         if not stack:
             return
 
-        delta = line.count("{") - line.count("}")
         stack[-1].brace_balance += delta
 
         # Propagate closing braces to outer packages if needed.
@@ -227,6 +250,3 @@ class SysMLParser:
             stack.pop()
             if leftover < 0 and stack:
                 stack[-1].brace_balance += leftover
-
-    def _unique(self, values: List[str]) -> List[str]:
-        return list(dict.fromkeys([val for val in values if val]))
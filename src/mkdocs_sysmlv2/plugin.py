@@ -9,12 +9,17 @@ from typing import Dict, Tuple
 from mkdocs.config import base, config_options
 from mkdocs.plugins import BasePlugin
 
+from .model import SysMLModel
 from .parser import SysMLParser
 from .renderer import SysMLRenderer
 
 log = logging.getLogger(f"mkdocs.plugins.{__name__}")
 
-BLOCK_PATTERN = re.compile(r"```(?P<header>[^\n]*)\n(?P<body>.*?)```", re.DOTALL)
+# The body runs up to the first closing fence; written as an unrolled loop
+# over non-backtick runs so the engine never steps back through the body.
+BLOCK_PATTERN = re.compile(
+    r"```(?P<header>[^\n]*)\n(?P<body>[^`]*(?:`(?!``)[^`]*)*)```"
+)
 ATTR_PATTERN = re.compile(r'(\w+)\s*=\s*"([^"]*)"')
 
 
@@ -31,32 +36,48 @@ class SysMLv2Plugin(BasePlugin[SysMLv2PluginConfig]):
     def __init__(self) -> None:
         self.parser = SysMLParser()
         self.renderer = SysMLRenderer()
-        self._languages = {"sysml", "sysmlv2"}
+        self._languages = frozenset({"sysml", "sysmlv2"})
+        # Parsed models keyed by (block body, source path). Models used during
+        # the last build are kept in _previous_models so unchanged blocks skip
+        # parsing on `mkdocs serve` rebuilds while edited ones age out after
+        # one build. This relies on on_startup keeping the instance alive.
+        self._model_cache: Dict[Tuple[str, str], SysMLModel] = {}
+        self._previous_models: Dict[Tuple[str, str], SysMLModel] = {}
+
+    def on_startup(self, *, command, dirty):
+        # Defining this hook makes MkDocs keep one plugin instance across
+        # `mkdocs serve` rebuilds, which the model cache depends on.
+        pass
 
     def on_config(self, config):
-        fences = {
+        fences = frozenset(
             name.strip().lower()
             for name in self.config["code_fences"].split(",")
             if name.strip()
-        }
-        self._languages = fences or {"sysml"}
+        )
+        self._languages = fences or frozenset({"sysml"})
         return config
 
     def on_page_markdown(self, markdown, page, config, files):
+        # Config values and page-level details do not change between blocks.
+        fmt = self.config["output_format"]
+        strict = self.config["strict"]
+        default_title = self._default_title(page)
+        caret = page and page.file and page.file.src_path or "<inline>"
+
         def replace(match):
             lang, attr_text = self._parse_header(match.group("header"))
             if lang not in self._languages:
                 return match.group(0)
 
             attrs = self._parse_attrs(attr_text)
-            title = attrs.get("title") or self._default_title(page)
-            caret = page and page.file and page.file.src_path or "<inline>"
+            title = attrs.get("title") or default_title
 
             try:
-                model = self.parser.parse(match.group("body"), source_path=caret)
+                model = self._parse_cached(match.group("body"), caret)
                 html = self.renderer.render(
                     model,
-                    fmt=self.config["output_format"],
+                    fmt=fmt,
                     title=title,
                     inline=True,
                 )
@@ -65,7 +86,7 @@ class SysMLv2Plugin(BasePlugin[SysMLv2PluginConfig]):
                 log.error(
                     "SysMLv2 plugin: failed to render block in %s (%s)", caret, exc
                 )
-                if self.config["strict"]:
+                if strict:
                     raise
                 return (
                     f"<pre class=\"sysmlv2-error\">SysML rendering failed: {exc}</pre>"
@@ -73,14 +94,28 @@ class SysMLv2Plugin(BasePlugin[SysMLv2PluginConfig]):
 
         return BLOCK_PATTERN.sub(replace, markdown)
 
+    def on_post_build(self, config):
+        self._previous_models = self._model_cache
+        self._model_cache = {}
+        # The parser outlives a single build on `mkdocs serve`; start the next
+        # one with an empty intern table so it only holds current names.
+        self.parser.reset()
+
+    def _parse_cached(self, body: str, source_path: str) -> SysMLModel:
+        key = (body, source_path)
+        model = self._model_cache.get(key)
+        if model is None:
+            model = self._previous_models.pop(key, None)
+            if model is None:
+                model = self.parser.parse(body, source_path=source_path)
+            self._model_cache[key] = model
+        return model
+
     def _parse_header(self, header: str) -> Tuple[str, str]:
-        header = (header or "").strip()
-        if not header:
+        parts = (header or "").strip().split(None, 1)
+        if not parts:
             return "", ""
-        parts = header.split(None, 1)
-        lang = parts[0].lower()
-        attrs = parts[1] if len(parts) > 1 else ""
-        return lang, attrs
+        return parts[0].lower(), parts[1] if len(parts) > 1 else ""
 
     def _parse_attrs(self, attr_text: str) -> Dict[str, str]:
         return {key.lower(): value for key, value in ATTR_PATTERN.findall(attr_text)}
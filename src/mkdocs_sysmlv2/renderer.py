@@ -3,18 +3,88 @@
 from __future__ import annotations
 
 import html
-from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Tuple
-
-from .model import SysMLElement, SysMLModel, SysMLRelation
-
-GLOBAL_PACKAGE = "__global__"
+import weakref
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .model import GLOBAL_PACKAGE, SysMLElement, SysMLModel, SysMLRelation
+
+# %-style record templates: one formatting call per node, detail line or edge.
+# The meta and detail lines are optional and filled into the node's last slot.
+NODE_TEMPLATE = (
+    '<g class="%s" transform="translate(%s,%s)">'
+    '<rect width="%s" height="%s" rx="8" ry="8"></rect>'
+    '<text class="sysmlv2-node__title" x="16" y="28">%s</text>'
+    "%s</g>"
+)
+META_TEMPLATE = '<text class="sysmlv2-node__meta" x="16" y="48">%s</text>'
+DETAILS_TEMPLATE = '<text class="sysmlv2-node__detail" x="16" y="64">%s</text>'
+DETAIL_TEMPLATE = '<tspan x="%s" dy="1.2em">%s</tspan>'
+EDGE_TEMPLATE = (
+    '<path class="sysmlv2-edge" d="M %s %s L %s %s" '
+    'marker-end="url(#sysmlv2-arrow)"></path>'
+    '<text class="sysmlv2-edge-label" x="%s" y="%s">%s</text>'
+)
+DEFS_BLOCK = (
+    '<defs><marker id="sysmlv2-arrow" viewBox="0 0 10 10" refX="10" refY="5" '
+    'markerUnits="strokeWidth" markerWidth="10" markerHeight="7" orient="auto">'
+    '<path d="M 0 0 L 10 5 L 0 10 z"></path></marker></defs>'
+)
+STYLE_BLOCK = """<style>
+.sysmlv2-canvas {
+  fill: #0f111a;
+  stroke: #1f2334;
+  stroke-width: 1;
+}
+.sysmlv2-package {
+  font: 700 14px "SFMono-Regular", Consolas, monospace;
+  fill: #cdd9ff;
+  text-anchor: middle;
+}
+.sysmlv2-node rect {
+  fill: #1f2334;
+  stroke: #5c6bc0;
+  stroke-width: 1.4;
+}
+.sysmlv2-node--external rect {
+  stroke-dasharray: 6 4;
+  stroke: #999fbf;
+}
+.sysmlv2-node__title {
+  font: 600 16px "Inter", "Segoe UI", sans-serif;
+  fill: #f4f6ff;
+}
+.sysmlv2-node__meta, .sysmlv2-node__detail tspan, .sysmlv2-node__detail {
+  font: 500 12px "Inter", "Segoe UI", sans-serif;
+  fill: #aeb8d9;
+}
+.sysmlv2-edge {
+  stroke: #7f91ff;
+  stroke-width: 1.5;
+  fill: none;
+}
+.sysmlv2-edge-label {
+  font: 600 12px "Inter", sans-serif;
+  fill: #9fb0ff;
+  text-anchor: middle;
+}
+.sysmlv2-empty {
+  font: 600 16px "Inter", sans-serif;
+  fill: #aeb8d9;
+  text-anchor: middle;
+}
+</style>"""
+# Top-left (x, y) corner of a placed node card.
+NodePosition = Tuple[float, float]
+# A node together with its position, in layout order.
+PlacedNode = Tuple[SysMLElement, float, float]
 
 
-@dataclass
-class NodePosition:
-    x: float
-    y: float
+@lru_cache(maxsize=4096)
+def _escape(text: str) -> str:
+    # Names, kinds and labels repeat across nodes, pages and rebuilds.
+    return html.escape(text)
 
 
 class SysMLRenderer:
@@ -27,67 +97,93 @@ class SysMLRenderer:
         self.margin_y = 64
         self.gap_x = 48
         self.gap_y = 32
+        # Distance between the origins of neighbouring columns and rows.
+        self._col_stride = self.node_width + self.gap_x
+        self._row_stride = self.node_height + self.gap_y
+        # Rendered SVG per model and (title, inline), tagged with the model
+        # version it was built from; weak keys let entries go with their model.
+        self._svg_cache: weakref.WeakKeyDictionary[
+            SysMLModel, Tuple[int, Dict[Tuple[str, bool], str]]
+        ] = weakref.WeakKeyDictionary()
+        self._formats = {
+            "svg": self._render_svg_format,
+            "html": self._render_html_format,
+        }
 
     def render(
         self, model: SysMLModel, *, fmt: str, title: str, inline: bool = False
     ) -> str:
-        if fmt == "svg":
-            return self.render_svg(model, title=title, inline=inline)
-        if fmt == "html":
-            svg = self.render_svg(model, title=title, inline=True)
-            return f"<figure class=\"sysmlv2-diagram\">{svg}</figure>"
-        raise ValueError(f"Unsupported format '{fmt}'")
+        try:
+            render_format = self._formats[fmt]
+        except KeyError:
+            raise ValueError(f"Unsupported format '{fmt}'") from None
+        return render_format(model, title, inline)
+
+    def _render_svg_format(self, model: SysMLModel, title: str, inline: bool) -> str:
+        return self.render_svg(model, title=title, inline=inline)
+
+    def _render_html_format(self, model: SysMLModel, title: str, inline: bool) -> str:
+        svg = self.render_svg(model, title=title, inline=True)
+        return f"<figure class=\"sysmlv2-diagram\">{svg}</figure>"
 
     def render_svg(self, model: SysMLModel, *, title: str, inline: bool = False) -> str:
+        entry = self._svg_cache.get(model)
+        if entry is None or entry[0] != model.version:
+            entry = self._svg_cache[model] = (model.version, {})
+        rendered = entry[1]
+        key = (title, inline)
+        svg = rendered.get(key)
+        if svg is None:
+            svg = rendered[key] = self._build_svg(model, title=title, inline=inline)
+        return svg
+
+    def _build_svg(self, model: SysMLModel, *, title: str, inline: bool) -> str:
         nodes = [node for node in model.nodes if node.kind != "package"]
         if not nodes:
             return self._render_empty_svg(title or "SysML model", model, inline=inline)
 
-        package_names = self._package_columns(nodes, model)
-        placements = self._layout_nodes(nodes, package_names)
-        row_counts = self._row_counts(nodes, package_names)
+        package_names, max_rows, placements, placed = self._prepare_layout(
+            nodes, model
+        )
         width = self._canvas_width(len(package_names))
-        height = self._canvas_height(max(row_counts.values()) if row_counts else 1)
-        edges = self._render_edges(model.relations, placements)
-        packages_svg = self._render_package_labels(package_names)
-        nodes_svg = self._render_nodes(nodes, placements)
+        height = self._canvas_height(max_rows)
 
-        svg_elements: List[str] = []
+        # A single join over every fragment; the helpers yield their markup
+        # so no per-section strings are built in between.
+        parts: List[str] = []
         if not inline:
-            svg_elements.append('<?xml version="1.0" encoding="UTF-8"?>')
-        svg_elements.append(
+            parts.append('<?xml version="1.0" encoding="UTF-8"?>\n')
+        parts.append(
             f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
-            f'height="{height}" viewBox="0 0 {width} {height}" role="img">'
+            f'height="{height}" viewBox="0 0 {width} {height}" role="img">\n'
+            f"<title>{_escape(title)}</title>\n"
         )
-        svg_elements.extend(
-            [
-                f"<title>{html.escape(title)}</title>",
-                self._style_block(),
-                '<defs><marker id="sysmlv2-arrow" viewBox="0 0 10 10" refX="10" refY="5" '
-                'markerUnits="strokeWidth" markerWidth="10" markerHeight="7" orient="auto">'
-                '<path d="M 0 0 L 10 5 L 0 10 z"></path></marker></defs>',
-                '<rect class="sysmlv2-canvas" x="0" y="0" '
-                f'width="{width}" height="{height}" rx="8" ry="8"></rect>',
-                packages_svg,
-                edges,
-                nodes_svg,
-            ]
+        parts.extend((STYLE_BLOCK, "\n", DEFS_BLOCK, "\n"))
+        parts.append(
+            '<rect class="sysmlv2-canvas" x="0" y="0" '
+            f'width="{width}" height="{height}" rx="8" ry="8"></rect>\n'
         )
+        parts.extend(self._render_package_labels(package_names))
+        parts.append("\n")
+        parts.extend(self._render_edges(model.relations, placements))
+        parts.append("\n")
+        parts.extend(self._render_nodes(placed))
+        parts.append("\n")
 
         if model.source_path:
-            svg_elements.append(
-                f'<desc>Source: {html.escape(str(model.source_path))}</desc>'
+            parts.append(
+                f'<desc>Source: {_escape(str(model.source_path))}</desc>\n'
             )
 
-        svg_elements.append("</svg>")
-        return "\n".join(svg_elements)
+        parts.append("</svg>")
+        return "".join(parts)
 
     def _render_empty_svg(
         self, title: str, model: SysMLModel, inline: bool = False
     ) -> str:
         width, height = 480, 200
         desc = (
-            html.escape(model.source_path) if model.source_path else "No elements found"
+            _escape(model.source_path) if model.source_path else "No elements found"
         )
         elements: List[str] = []
         if not inline:
@@ -96,8 +192,8 @@ class SysMLRenderer:
             [
                 f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
                 f'height="{height}" viewBox="0 0 {width} {height}" role="img">',
-                f"<title>{html.escape(title)}</title>",
-                self._style_block(),
+                f"<title>{_escape(title)}</title>",
+                STYLE_BLOCK,
                 '<rect class="sysmlv2-canvas" x="0" y="0" '
                 f'width="{width}" height="{height}" rx="8" ry="8"></rect>',
                 f'<text class="sysmlv2-empty" x="{width/2}" y="{height/2}">'
@@ -108,62 +204,33 @@ class SysMLRenderer:
         )
         return "\n".join(elements)
 
-    def _package_columns(self, nodes: List[SysMLElement], model: SysMLModel) -> List[str]:
-        declared = [pkg.name for pkg in model.packages]
-        package_names: List[str] = []
-
-        def normalize(value: Optional[str]) -> str:
-            return value if value else GLOBAL_PACKAGE
-
-        for pkg in declared:
-            if any(normalize(node.package) == pkg for node in nodes):
-                package_names.append(pkg)
-
+    def _prepare_layout(
+        self, nodes: List[SysMLElement], model: SysMLModel
+    ) -> Tuple[List[str], int, Dict[str, NodePosition], List[PlacedNode]]:
+        columns: Dict[str, List[SysMLElement]] = defaultdict(list)
         for node in nodes:
-            normalized = normalize(node.package)
-            if normalized not in package_names:
-                package_names.append(normalized)
+            columns[node.package or GLOBAL_PACKAGE].append(node)
 
-        if not package_names:
-            package_names = [GLOBAL_PACKAGE]
-        return package_names
+        # Declared packages come first, in declaration order, then any other
+        # package referenced by a node in first-seen order.
+        package_names = [pkg.name for pkg in model.packages if pkg.name in columns]
+        declared = set(package_names)
+        package_names.extend(pkg for pkg in columns if pkg not in declared)
 
-    def _layout_nodes(
-        self, nodes: List[SysMLElement], package_names: List[str]
-    ) -> Dict[str, NodePosition]:
+        max_rows = 0
         placements: Dict[str, NodePosition] = {}
-        columns: Dict[str, List[SysMLElement]] = {
-            pkg: [] for pkg in package_names
-        }
-
-        def normalize(value: Optional[str]) -> str:
-            return value if value else GLOBAL_PACKAGE
-
-        for node in nodes:
-            pkg = normalize(node.package)
-            if pkg not in columns:
-                columns[pkg] = []
-            columns[pkg].append(node)
-
+        placed: List[PlacedNode] = []
         for column_index, pkg in enumerate(package_names):
-            y = self.margin_y
-            for node in columns.get(pkg, []):
-                placements[node.name] = NodePosition(
-                    x=self.margin_x + column_index * (self.node_width + self.gap_x),
-                    y=y,
-                )
-                y += self.node_height + self.gap_y
+            column = columns[pkg]
+            if len(column) > max_rows:
+                max_rows = len(column)
+            x = self.margin_x + column_index * self._col_stride
+            for row_index, node in enumerate(column):
+                y = self.margin_y + row_index * self._row_stride
+                placements[node.name] = (x, y)
+                placed.append((node, x, y))
 
-        return placements
-
-    def _row_counts(
-        self, nodes: List[SysMLElement], package_names: List[str]
-    ) -> Dict[str, int]:
-        counts: Dict[str, int] = {pkg: 0 for pkg in package_names}
-        for node in nodes:
-            pkg = node.package or GLOBAL_PACKAGE
-            counts[pkg] = counts.get(pkg, 0) + 1
-        return counts
+        return package_names, max_rows, placements, placed
 
     def _canvas_width(self, columns: int) -> float:
         if columns <= 0:
@@ -183,131 +250,73 @@ class SysMLRenderer:
             + (rows - 1) * self.gap_y
         )
 
-    def _render_nodes(
-        self, nodes: List[SysMLElement], placements: Dict[str, NodePosition]
-    ) -> str:
-        parts: List[str] = []
-        for node in nodes:
-            if node.name not in placements:
-                continue
-            position = placements[node.name]
+    def _render_nodes(self, placed: List[PlacedNode]) -> Iterator[str]:
+        for node, x, y in placed:
             classes = ["sysmlv2-node"]
             if node.external:
                 classes.append("sysmlv2-node--external")
             class_attr = " ".join(classes)
 
-            headline = html.escape(node.name)
-            meta_bits: List[str] = [node.kind]
+            headline = _escape(node.name)
+            # Fields are escaped one by one (and memoized); the separators are
+            # markup-safe literals, so the joined text needs no second pass.
+            meta_bits: List[str] = [_escape(node.kind)]
             if node.flavor:
-                meta_bits.append(node.flavor)
+                meta_bits.append(_escape(node.flavor))
             if node.modifiers:
-                meta_bits.extend(node.modifiers)
+                meta_bits.extend(_escape(modifier) for modifier in node.modifiers)
             meta_text = " · ".join(meta_bits)
 
             details: List[str] = []
             if node.specializes:
-                details.append("⇢ " + ", ".join(node.specializes))
+                details.append("⇢ " + ", ".join(map(_escape, node.specializes)))
             if node.type_of:
-                details.append("↦ " + ", ".join(node.type_of))
+                details.append("↦ " + ", ".join(map(_escape, node.type_of)))
 
-            detail_spans = "".join(
-                f'<tspan x="{position.x + 16}" dy="1.2em">{html.escape(detail)}</tspan>'
-                for detail in details
-            )
+            extras = META_TEMPLATE % meta_text if meta_text else ""
+            if details:
+                detail_x = x + 16
+                extras += DETAILS_TEMPLATE % "".join(
+                    DETAIL_TEMPLATE % (detail_x, detail) for detail in details
+                )
 
-            parts.append(
-                f'<g class="{class_attr}" transform="translate({position.x},{position.y})">'
-                f'<rect width="{self.node_width}" height="{self.node_height}" rx="8" ry="8"></rect>'
-                f'<text class="sysmlv2-node__title" x="16" y="28">{headline}</text>'
-                f'<text class="sysmlv2-node__meta" x="16" y="48">{html.escape(meta_text)}</text>'
-                f'<text class="sysmlv2-node__detail" x="16" y="64">{detail_spans or ""}</text>'
-                "</g>"
+            yield NODE_TEMPLATE % (
+                class_attr,
+                x,
+                y,
+                self.node_width,
+                self.node_height,
+                headline,
+                extras,
             )
-        return "".join(parts)
 
     def _render_edges(
         self, relations: Iterable[SysMLRelation], placements: Dict[str, NodePosition]
-    ) -> str:
-        paths: List[str] = []
+    ) -> Iterator[str]:
+        half_width = self.node_width / 2
+        half_height = self.node_height / 2
         for relation in relations:
-            if relation.source not in placements or relation.target not in placements:
+            src = placements.get(relation.source)
+            dst = placements.get(relation.target)
+            if src is None or dst is None:
                 continue
-            src = placements[relation.source]
-            dst = placements[relation.target]
-            x1 = src.x + self.node_width / 2
-            y1 = src.y + self.node_height / 2
-            x2 = dst.x + self.node_width / 2
-            y2 = dst.y + self.node_height / 2
+            x1 = src[0] + half_width
+            y1 = src[1] + half_height
+            x2 = dst[0] + half_width
+            y2 = dst[1] + half_height
             label = relation.label or relation.relation
             mx = (x1 + x2) / 2
             my = (y1 + y2) / 2
 
-            paths.append(
-                f'<path class="sysmlv2-edge" d="M {x1} {y1} L {x2} {y2}" '
-                'marker-end="url(#sysmlv2-arrow)"></path>'
-                f'<text class="sysmlv2-edge-label" x="{mx}" y="{my}">{html.escape(label)}</text>'
-            )
-        return "".join(paths)
+            yield EDGE_TEMPLATE % (x1, y1, x2, y2, mx, my, _escape(label))
 
-    def _render_package_labels(self, package_names: List[str]) -> str:
-        parts: List[str] = []
+    def _render_package_labels(self, package_names: List[str]) -> Iterator[str]:
         for column_index, pkg in enumerate(package_names):
             label = "Global" if pkg == GLOBAL_PACKAGE else pkg
             x = (
                 self.margin_x
-                + column_index * (self.node_width + self.gap_x)
+                + column_index * self._col_stride
                 + self.node_width / 2
             )
             y = self.margin_y / 2
-            parts.append(
-                f'<text class="sysmlv2-package" x="{x}" y="{y}">{html.escape(label)}</text>'
-            )
-        return "".join(parts)
-
-    def _style_block(self) -> str:
-        return """
-<style>
-.sysmlv2-canvas {
-  fill: #0f111a;
-  stroke: #1f2334;
-  stroke-width: 1;
-}
-.sysmlv2-package {
-  font: 700 14px "SFMono-Regular", Consolas, monospace;
-  fill: #cdd9ff;
-  text-anchor: middle;
-}
-.sysmlv2-node rect {
-  fill: #1f2334;
-  stroke: #5c6bc0;
-  stroke-width: 1.4;
-}
-.sysmlv2-node--external rect {
-  stroke-dasharray: 6 4;
-  stroke: #999fbf;
-}
-.sysmlv2-node__title {
-  font: 600 16px "Inter", "Segoe UI", sans-serif;
-  fill: #f4f6ff;
-}
-.sysmlv2-node__meta, .sysmlv2-node__detail tspan, .sysmlv2-node__detail {
-  font: 500 12px "Inter", "Segoe UI", sans-serif;
-  fill: #aeb8d9;
-}
-.sysmlv2-edge {
-  stroke: #7f91ff;
-  stroke-width: 1.5;
-  fill: none;
-}
-.sysmlv2-edge-label {
-  font: 600 12px "Inter", sans-serif;
-  fill: #9fb0ff;
-  text-anchor: middle;
-}
-.sysmlv2-empty {
-  font: 600 16px "Inter", sans-serif;
-  fill: #aeb8d9;
-  text-anchor: middle;
-}
-</style>
-        """.strip()
+            yield f'<text class="sysmlv2-package" x="{x}" y="{y}">{_escape(label)}</text>'
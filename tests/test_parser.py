@@ -0,0 +1,150 @@
+"""Tests for the SysML v2 text parser."""
+
+from __future__ import annotations
+
+import pytest
+
+from mkdocs_sysmlv2.parser import SysMLParser
+
+
+def relations(model):
+    return [(rel.source, rel.target, rel.relation) for rel in model.relations]
+
+
+@pytest.mark.parametrize(
+    ("line", "expected"),
+    [
+        ("part def A :> B;", ["part", "def", "A", ":>", "B;"]),
+        ("part def A :>B;", ["part", "def", "A", ":>", "B;"]),
+        ("part def A :>> B;", ["part", "def", "A", ":>>", "B;"]),
+        ("part def A :>>B;", ["part", "def", "A", ":>>", "B;"]),
+        ("part x : Base;", ["part", "x", ":", "Base;"]),
+        ("part x :Base;", ["part", "x", ":", "Base;"]),
+        # An operator glued to the name stays part of the name token.
+        ("part def A:>B;", ["part", "def", "A:>B;"]),
+        ("part def Demo::Thing;", ["part", "def", "Demo::Thing;"]),
+        ("part def A :>> B, C;", ["part", "def", "A", ":>>", "B", "C;"]),
+        ("part def A :> B,C {", ["part", "def", "A", ":>", "B", "C", "{"]),
+        ("part def A{", ["part", "def", "A", "{"]),
+        ("}", ["}"]),
+        ('attribute "quoted name" : String;', ["attribute", "quoted name", ":", "String;"]),
+        ("part 'weird' :>> Over;", ["part", "weird", ":>>", "Over;"]),
+        # Backslash is not an escape character.
+        ("part def A :> C\\D;", ["part", "def", "A", ":>", "C\\D;"]),
+        # Semicolons inside HTML entities do not split the token.
+        ("part def R&amp;D;", ["part", "def", "R&amp;D;"]),
+        ("part x : Q&lt;T&gt;;", ["part", "x", ":", "Q&lt;T&gt;;"]),
+        # An unbalanced quote invalidates the whole line.
+        ("part def Driver's;", []),
+        ('part def A :> "B', []),
+    ],
+)
+def test_tokenize(line, expected):
+    assert SysMLParser()._tokenize(line) == expected
+
+
+def test_specializes_without_space_after_operator():
+    model = SysMLParser().parse("part def A :>B;")
+
+    node = next(node for node in model.nodes if node.name == "A")
+    assert node.specializes == ["B"]
+    assert relations(model) == [("A", "B", "specializes")]
+    assert [(node.name, node.external) for node in model.nodes] == [
+        ("A", False),
+        ("B", True),
+    ]
+
+
+def test_typed_without_space_after_operator():
+    model = SysMLParser().parse("part x :Base;")
+
+    node = next(node for node in model.nodes if node.name == "x")
+    assert node.type_of == ["Base"]
+    assert relations(model) == [("x", "Base", "typed")]
+    assert [(node.name, node.external) for node in model.nodes] == [
+        ("x", False),
+        ("Base", True),
+    ]
+
+
+def test_backslash_is_kept_in_names():
+    model = SysMLParser().parse("part def A :> C\\D;")
+
+    assert relations(model) == [("A", "C\\D", "specializes")]
+
+
+def test_entity_in_definition_name_is_unescaped():
+    model = SysMLParser().parse("part def R&amp;D;")
+
+    assert [node.name for node in model.nodes] == ["R&D"]
+
+
+def test_entity_in_type_is_unescaped():
+    model = SysMLParser().parse("part x : Q&lt;T&gt;;")
+
+    assert relations(model) == [("x", "Q<T>", "typed")]
+    assert [node.name for node in model.nodes] == ["x", "Q<T>"]
+
+
+@pytest.mark.parametrize(
+    ("token", "expected"),
+    [
+        ("R&amp;D;", "R&D"),
+        ("Q&lt;T&gt;;", "Q<T>"),
+        ("&quot;Liquid&quot;;", "Liquid"),
+        ("Plain;", "Plain"),
+    ],
+)
+def test_clean_identifier_unescapes_entities(token, expected):
+    assert SysMLParser()._clean_identifier(token) == expected
+
+
+def test_connect_and_from_lines_only_add_relations():
+    model = SysMLParser().parse(
+        "part a;\npart b;\nconnect a to b;\nfrom a to b;\nConnect a with b;"
+    )
+
+    assert [node.name for node in model.nodes] == ["a", "b"]
+    assert relations(model) == [
+        ("a", "b", "connects"),
+        ("a", "b", "flows"),
+        ("a", "b", "connects"),
+    ]
+
+
+def test_connect_to_undeclared_parts_adds_external_nodes():
+    model = SysMLParser().parse("connect engine to wheel;")
+
+    assert [(node.name, node.kind, node.external) for node in model.nodes] == [
+        ("engine", "external", True),
+        ("wheel", "external", True),
+    ]
+
+
+def package_of(model):
+    return {node.name: node.package for node in model.nodes}
+
+
+def test_brace_in_line_comment_does_not_close_package():
+    model = SysMLParser().parse(
+        "package P {\n  part def A; // closing } here\n  part def B;\n}\npart def C;"
+    )
+
+    assert package_of(model) == {"A": "P", "B": "P", "C": None}
+
+
+def test_brace_in_block_comment_does_not_close_package():
+    model = SysMLParser().parse(
+        "package P {\n  /* } */ part def A;\n  part def B;\n}\npart def C;"
+    )
+
+    assert package_of(model) == {"A": "P", "B": "P", "C": None}
+
+
+def test_brace_in_quoted_string_does_not_open_scope():
+    model = SysMLParser().parse(
+        'package P {\n  attribute x : "has { brace";\n  part def B;\n}\npart def C;'
+    )
+
+    assert package_of(model)["B"] == "P"
+    assert package_of(model)["C"] is None
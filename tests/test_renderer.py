@@ -0,0 +1,50 @@
+"""Tests for the SVG renderer."""
+
+from __future__ import annotations
+
+from mkdocs_sysmlv2.model import SysMLElement, SysMLModel, SysMLRelation
+from mkdocs_sysmlv2.renderer import SysMLRenderer
+
+
+def make_model():
+    model = SysMLModel()
+    model.add_node(SysMLElement(name="Alpha", kind="part", flavor="def"))
+    return model
+
+
+def test_repeated_render_returns_cached_svg():
+    renderer = SysMLRenderer()
+    model = make_model()
+
+    first = renderer.render_svg(model, title="Demo", inline=True)
+
+    assert renderer.render_svg(model, title="Demo", inline=True) is first
+
+
+def test_render_after_add_node_includes_new_node():
+    renderer = SysMLRenderer()
+    model = make_model()
+
+    before = renderer.render_svg(model, title="Demo", inline=True)
+    model.add_node(SysMLElement(name="Beta", kind="part", flavor="def"))
+    after = renderer.render_svg(model, title="Demo", inline=True)
+
+    assert "Beta" not in before
+    assert "Beta" in after
+    assert renderer.render_svg(model, title="Demo", inline=True) is after
+
+
+def test_render_after_add_relation_includes_new_edge():
+    renderer = SysMLRenderer()
+    model = make_model()
+    model.add_node(SysMLElement(name="Beta", kind="part", flavor="def"))
+
+    before = renderer.render_svg(model, title="Demo", inline=True)
+    model.add_relation(
+        SysMLRelation(source="Alpha", target="Beta", relation="connects", label="links")
+    )
+    after = renderer.render_svg(model, title="Demo", inline=True)
+
+    assert "links" not in before
+    assert "links" in after
+    assert renderer.render_svg(model, title="Demo", inline=True) is after